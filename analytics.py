@@ -0,0 +1,380 @@
+"""
+Per-turn analytics of simulated games, stored as fixed-width columns. Requires numpy.
+
+Every offensive roll phase becomes one row of TURN_DTYPE. Rows are collected in NumPy structured
+arrays and appended in batches to one raw binary file per column, so a directory of turns can be
+opened with np.memmap and sliced without parsing, however many turns it holds.
+
+Layout of a turns directory:
+    schema.json        column names, dtypes and shapes, the condition order of the bitmask columns,
+                       and the number of rows written to every column
+    <column>.bin       the column's values for every row, back to back. Anything past the row count
+                       is left over from an interrupted write and is ignored.
+
+Example:
+    python analytics.py --games 100000 --out turns
+    python analytics.py --summary --out turns
+
+    turns = analytics.openTurns("turns")
+    blinded = (turns["conditionsSpent"] & turns.conditionBit("Blind")) != 0
+    print(turns["blindSkipped"][blinded].mean())
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+import diceThrone
+import simulator
+
+ROLLS = 3
+DICE = 5
+CONDITIONS = ["Targeted", "Blind", "Entangle", "Evasive"] #Bit order of the condition bitmasks. Append only; it is saved with every turns directory.
+
+TURN_DTYPE = np.dtype([
+    ("game", np.uint32), #The game's seed
+    ("turn", np.uint16),
+    ("player", np.uint8),
+    ("attempts", np.uint8), #Rolls made this phase
+    ("dice", np.uint8, (ROLLS, DICE)), #Dice values after each roll, 0 where no roll was made
+    ("locks", np.uint8, (ROLLS - 1,)), #Bitmask of dice locked after each roll, by dice position
+    ("ability", np.int8), #Index into the hero's abilities, -1 for none
+    ("damageDealt", np.int16),
+    ("damageTaken", np.int16),
+    ("defended", np.bool_), #The opponent made a defensive roll
+    ("blocked", np.bool_), #The defensive roll blocked half the damage
+    ("defenseDice", np.uint8, (DICE,)),
+    ("conditionsGained", np.uint8), #Bitmask of conditions the opponent gained
+    ("conditionsSpent", np.uint8), #Bitmask of the player's own conditions used up
+    ("blindSkipped", np.bool_),
+])
+
+def conditionBit(name, conditions = CONDITIONS):
+    return 1 << conditions.index(name)
+
+def conditionMask(names):
+    mask = 0
+    for name in names:
+        if name in CONDITIONS:
+            mask |= conditionBit(name)
+    return mask
+
+def missing(before, after):
+    """
+    Returns the names in before that are not in after, counting repeats.
+    """
+    remaining = after.copy()
+    gone = []
+    for name in before:
+        if name in remaining:
+            remaining.remove(name)
+        else:
+            gone.append(name)
+    return gone
+
+class TurnRecorder:
+    """
+    Records every offensive roll phase of one game as a row.
+
+    Wraps each player's policy to see the dice after every roll and the locks and ability chosen,
+    and listens to the renderer for defensive rolls.
+
+    Attributes:
+        heroes (list of Hero objects): The players.
+        game (int): Game id written to every row.
+        rows (list of tuples): Recorded rows in TURN_DTYPE order.
+        turn (int): Phases recorded so far.
+        attacker (int): The player whose ability is being resolved.
+        health (list of int): Health of each player at the end of the last phase.
+        conditions (list of lists): Condition names of each player at the end of the last phase.
+    """
+
+    def __init__(self, heroes, game):
+        self.heroes = heroes
+        self.game = game
+        self.rows = []
+        self.turn = 0
+        self.attacker = 0
+        self.health = [hero.health for hero in heroes]
+        self.conditions = [[condition.name for condition in hero.conditions] for hero in heroes]
+        self.startPhase()
+
+    def startPhase(self):
+        self.dice = np.zeros((ROLLS, DICE), np.uint8)
+        self.locks = np.zeros(ROLLS - 1, np.uint8)
+        self.attempts = 0
+        self.ability = -1
+        self.defended = False
+        self.blocked = False
+        self.defenseDice = [0] * DICE
+
+    def policy(self, player, policy):
+        return RecordingPolicy(self, player, policy)
+
+    def hear(self, event, message):
+        if event == "defenseRoll" and not self.defended:
+            #Read now: Evasive can reroll the defender's dice later in the same attack
+            self.defended = True
+            self.defenseDice = [dice.value for dice in self.heroes[1 - self.attacker].dice]
+        elif event == "block":
+            self.blocked = True
+
+    def recordRoll(self, hero):
+        self.dice[self.attempts] = [dice.value for dice in hero.dice]
+        self.attempts += 1
+
+    def endPhase(self, player):
+        hero = self.heroes[player]
+        opponent = self.heroes[1 - player]
+
+        conditions = [[condition.name for condition in each.conditions] for each in self.heroes]
+
+        self.rows.append((
+            self.game,
+            self.turn,
+            player,
+            self.attempts,
+            self.dice,
+            self.locks,
+            self.ability,
+            self.health[1 - player] - opponent.health,
+            self.health[player] - hero.health,
+            self.defended,
+            self.blocked,
+            self.defenseDice,
+            conditionMask(missing(conditions[1 - player], self.conditions[1 - player])),
+            conditionMask(missing(self.conditions[player], conditions[player])),
+            self.attempts == 0,
+        ))
+
+        self.turn += 1
+        self.health = [each.health for each in self.heroes]
+        self.conditions = conditions
+        self.startPhase()
+
+    def array(self):
+        return np.array(self.rows, dtype = TURN_DTYPE)
+
+class RecordingPolicy:
+    """
+    Passes decisions through to another policy while reporting them to a TurnRecorder.
+    """
+
+    def __init__(self, recorder, player, policy):
+        self.recorder = recorder
+        self.player = player
+        self.policy = policy
+
+    def chooseLocks(self, hero, opponent):
+        self.recorder.recordRoll(hero)
+        locks = self.policy.chooseLocks(hero, opponent)
+        mask = 0
+        for i in range(len(locks)):
+            if locks[i]:
+                mask |= 1 << i
+        self.recorder.locks[self.recorder.attempts - 1] = mask
+        return locks
+
+    def chooseAbility(self, hero, opponent, abilities):
+        self.recorder.recordRoll(hero)
+        self.recorder.attacker = self.player
+        ability = self.policy.chooseAbility(hero, opponent, abilities)
+        if ability is not None:
+            self.recorder.ability = hero.abilities.index(ability)
+        return ability
+
+    def spendEvasive(self, hero):
+        return self.policy.spendEvasive(hero)
+
+    def endTurn(self, hero, opponent):
+        self.policy.endTurn(hero, opponent)
+        self.recorder.endPhase(self.player)
+
+def recordGame(seed, parameters = {}, opponentParameters = {}, policies = None):
+    """
+    Plays one game and returns its turns as a TURN_DTYPE array.
+    """
+    if policies is None:
+        policies = [simulator.GreedyPolicy(), simulator.GreedyPolicy()]
+
+    heroes = [diceThrone.createMoonElf("Moon Elf", parameters), diceThrone.createMoonElf("Opponent", opponentParameters)]
+    recorder = TurnRecorder(heroes, seed)
+    renderer = diceThrone.NullRenderer()
+    renderer.subscribe(recorder.hear)
+
+    simulator.simulateGame(heroes, seed, [recorder.policy(0, policies[0]), recorder.policy(1, policies[1])], renderer = renderer)
+    return recorder.array()
+
+def recordShard(job):
+    """
+    Records a shard of games. Runs in a worker process.
+    """
+    seeds, parameters, opponentParameters = job
+    return np.concatenate([recordGame(seed, parameters, opponentParameters) for seed in seeds])
+
+class TurnWriter:
+    """
+    Appends TURN_DTYPE rows to a turns directory, one file per column, in batches.
+
+    Attributes:
+        directory (str): The turns directory. Created, with its schema, if it does not exist.
+        batchSize (int): Rows held before they are written out.
+        buffer (ndarray): Rows waiting to be written.
+        count (int): Rows in the buffer.
+        rows (int): Rows written to every column and recorded in schema.json.
+    """
+
+    def __init__(self, directory, batchSize = 65536):
+        self.directory = directory
+        self.batchSize = batchSize
+        self.buffer = np.zeros(batchSize, dtype = TURN_DTYPE)
+        self.count = 0
+        self.rows = 0
+
+        os.makedirs(directory, exist_ok = True)
+        path = os.path.join(directory, "schema.json")
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                saved = json.load(f)
+            if not isinstance(saved, dict) or {key: saved.get(key) for key in schema()} != schema():
+                raise ValueError("{} holds turns with a different schema".format(directory))
+            self.rows = saved.get("rows", 0)
+
+            #Drop whatever an interrupted write left past the recorded rows
+            for name in TURN_DTYPE.names:
+                column = os.path.join(directory, name + ".bin")
+                if os.path.exists(column):
+                    with open(column, "r+b") as f:
+                        f.truncate(self.rows * TURN_DTYPE[name].itemsize)
+        else:
+            self.writeSchema()
+
+    def writeSchema(self):
+        """
+        Records the row count through a temporary file, so schema.json is never left half written.
+        """
+        path = os.path.join(self.directory, "schema.json")
+        temporary = "{}.{}.tmp".format(path, os.getpid())
+        with open(temporary, "w") as f:
+            json.dump(dict(schema(), rows = self.rows), f, indent = 1)
+        os.replace(temporary, path)
+
+    def write(self, rows):
+        start = 0
+        while start < len(rows):
+            taken = min(len(rows) - start, self.batchSize - self.count)
+            self.buffer[self.count : self.count + taken] = rows[start : start + taken]
+            self.count += taken
+            start += taken
+            if self.count == self.batchSize:
+                self.flush()
+
+    def flush(self):
+        """
+        Appends the buffered rows to every column, then records them as written.
+        """
+        if self.count == 0:
+            return
+        for name in TURN_DTYPE.names:
+            with open(os.path.join(self.directory, name + ".bin"), "ab") as f:
+                f.write(np.ascontiguousarray(self.buffer[name][:self.count]).tobytes())
+        self.rows += self.count
+        self.count = 0
+        self.writeSchema()
+
+    def close(self):
+        self.flush()
+
+def schema():
+    return {
+        "columns": [[name, TURN_DTYPE[name].base.str, list(TURN_DTYPE[name].shape)] for name in TURN_DTYPE.names],
+        "conditions": CONDITIONS,
+    }
+
+class Turns(dict):
+    """
+    Column name to an array with one entry per turn, as returned by openTurns.
+
+    Attributes:
+        conditions (list of str): Bit order of the directory's condition bitmasks.
+    """
+
+    def __init__(self, conditions):
+        super().__init__()
+        self.conditions = conditions
+
+    def conditionBit(self, name):
+        return conditionBit(name, self.conditions)
+
+def openTurns(directory):
+    """
+    Memory-maps a turns directory read only, up to the row count recorded in its schema.
+
+    Returns:
+        Turns: Column name to an array with one entry per turn.
+    """
+    with open(os.path.join(directory, "schema.json"), "r") as f:
+        saved = json.load(f)
+
+    rows = saved.get("rows", 0)
+    turns = Turns(saved["conditions"])
+    for name, dtype, shape in saved["columns"]:
+        path = os.path.join(directory, name + ".bin")
+        if rows == 0:
+            turns[name] = np.zeros((0, *shape), dtype)
+        else:
+            turns[name] = np.memmap(path, dtype, "r", shape = (rows, *shape))
+    return turns
+
+def export(directory, games = 10000, firstSeed = 0, parameters = {}, opponentParameters = {}, processes = None, shardSize = 200):
+    """
+    Simulates games across worker processes and appends their turns to a turns directory.
+
+    Returns:
+        int: Turns written.
+    """
+    jobs = [(range(seed, min(seed + shardSize, firstSeed + games)), parameters, opponentParameters) for seed in range(firstSeed, firstSeed + games, shardSize)]
+
+    writer = TurnWriter(directory)
+    written = 0
+    for rows in simulator.iterShards(recordShard, jobs, processes):
+        writer.write(rows)
+        written += len(rows)
+    writer.close()
+    return written
+
+def summary(turns):
+    """
+    Prints how often each ability is chosen and how often Blind skips a turn.
+    """
+    abilityNames = [ability.name for ability in diceThrone.createMoonElf().abilities]
+    total = len(turns["turn"])
+    print("{} turns from {} games.".format(total, len(np.unique(turns["game"]))))
+
+    counts = np.bincount(turns["ability"][turns["ability"] >= 0], minlength = len(abilityNames))
+    for i in range(len(abilityNames)):
+        used = turns["ability"] == i
+        if counts[i] > 0:
+            print("{}: {:.1%} of turns, {:.2f} damage on average".format(abilityNames[i], counts[i] / total, turns["damageDealt"][used].mean()))
+
+    blinded = (turns["conditionsSpent"] & turns.conditionBit("Blind")) != 0
+    if blinded.any():
+        print("Blind: spent on {} turns, skipped {:.1%} of them.".format(blinded.sum(), turns["blindSkipped"][blinded].mean()))
+
+def main():
+    parser = argparse.ArgumentParser(description = "Export per-turn analytics of simulated Moon Elf games.")
+    parser.add_argument("--games", type = int, default = 10000)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--processes", type = int, default = None)
+    parser.add_argument("--out", default = "turns")
+    parser.add_argument("--summary", action = "store_true", help = "Summarize an existing turns directory instead")
+    args = parser.parse_args()
+
+    if not args.summary:
+        print("Wrote {} turns to {}.".format(export(args.out, args.games, args.seed, processes = args.processes), args.out))
+    summary(openTurns(args.out))
+
+if __name__ == "__main__":
+    main()
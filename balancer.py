@@ -0,0 +1,195 @@
+"""
+Parameter sweeps over the Moon Elf definition.
+
+Every combination of the given parameter ranges is played against a fixed opponent over the same
+set of seeds. Each configuration's aggregate results are cached on disk, keyed by a hash of the
+simulator's rules version, the compiled hero definitions and the seeds, so re-running or extending a sweep
+only plays new configurations.
+
+Example:
+    python balancer.py --param longbow3Damage=3:6 --param targetedBonus=1,2,3 --games 500
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+
+import diceThrone
+import simulator
+
+def compileHero(hero):
+    """
+    Returns a canonical text description of everything about a hero that affects a game. The name is left out.
+    """
+    output = "Health: {}".format(hero.health)
+    output += "\nCombat Points: {}".format(hero.cp)
+    for dice in hero.dice:
+        output += "\nDice: {}".format(', '.join(dice.sides))
+    for ability in hero.abilities:
+        output += "\n{}".format(str(ability))
+        output += "\nDefense: {}, Ultimate: {}".format(ability.defense, ability.ultimate)
+    return output
+
+def configurationKey(parameters, opponentParameters, seeds):
+    """
+    Returns the cache key of a configuration: a hash of the simulator's rules version, both compiled heroes and the seeds played.
+    """
+    text = "Rules: {}\n".format(simulator.RULES_VERSION)
+    text += compileHero(diceThrone.createMoonElf(parameters = parameters))
+    text += "\n=== Opponent\n" + compileHero(diceThrone.createMoonElf(parameters = opponentParameters))
+    text += "\n=== Seeds\n" + ','.join(map(str, seeds))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def configurations(ranges):
+    """
+    Expands a dict of parameter name to list of values into every combination, as a list of dicts.
+    """
+    names = sorted(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*[ranges[name] for name in names])]
+
+def aggregate(results):
+    """
+    Summarises simulated games from the first player's point of view.
+    """
+    games = len(results)
+    summary = {
+        "games": games,
+        "wins": 0,
+        "losses": 0,
+        "draws": 0,
+        "meanTurns": 0,
+        "meanDamageDealt": 0,
+        "meanDamageTaken": 0,
+        "abilityUses": {},
+        "abilityDamage": {},
+    }
+
+    for result in results:
+        if result["winner"] == 0:
+            summary["wins"] += 1
+        elif result["winner"] == 1:
+            summary["losses"] += 1
+        else:
+            summary["draws"] += 1
+        summary["meanTurns"] += result["turns"] / games
+        summary["meanDamageDealt"] += result["damage"][0] / games
+        summary["meanDamageTaken"] += result["damage"][1] / games
+        for name in result["abilityUses"][0]:
+            summary["abilityUses"][name] = summary["abilityUses"].get(name, 0) + result["abilityUses"][0][name]
+            summary["abilityDamage"][name] = summary["abilityDamage"].get(name, 0) + result["abilityDamage"][0][name]
+
+    summary["winRate"] = summary["wins"] / games if games else 0
+    return summary
+
+def runConfiguration(job):
+    """
+    Plays every seed of one configuration. Runs in a worker process.
+
+    Parameters:
+        job (tuple): Cache key, parameters, opponent parameters and seeds.
+
+    Returns:
+        tuple: The cache key, the parameters and their aggregate results.
+    """
+    key, parameters, opponentParameters, seeds = job
+
+    results = []
+    for seed in seeds:
+        heroes = [diceThrone.createMoonElf("Moon Elf", parameters), diceThrone.createMoonElf("Opponent", opponentParameters)]
+        results.append(simulator.simulateGame(heroes, seed))
+
+    return key, parameters, aggregate(results)
+
+def readCache(path):
+    """
+    Returns the cached results at path, or None if there are none or the file is unreadable.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)["results"]
+    except (ValueError, KeyError):
+        return None
+
+def writeCache(path, entry):
+    """
+    Writes a cache entry through a temporary file, so an interrupted sweep never leaves a partial entry behind.
+    """
+    temporary = "{}.{}.tmp".format(path, os.getpid())
+    with open(temporary, "w") as f:
+        json.dump(entry, f)
+    os.replace(temporary, path)
+
+def sweep(ranges, games = 200, firstSeed = 0, opponentParameters = {}, processes = None, cacheDir = "balanceCache"):
+    """
+    Runs a parameter sweep, reusing cached configurations.
+
+    Parameters:
+        ranges (dict): Moon Elf parameter name to the list of values to try.
+        games (int): Games played per configuration.
+        firstSeed (int): Seed of the first game. Every configuration plays the same seeds.
+        opponentParameters (dict): Parameters of the fixed opponent Moon Elf.
+        processes (int): Worker processes. Defaults to the number of cores.
+        cacheDir (str): Directory holding one json file per configuration.
+
+    Returns:
+        list of tuples: (parameters, aggregate results) for every configuration, in sweep order.
+    """
+    os.makedirs(cacheDir, exist_ok = True)
+    seeds = list(range(firstSeed, firstSeed + games))
+
+    jobs = []
+    keys = []
+    results = {}
+    for parameters in configurations(ranges):
+        key = configurationKey(parameters, opponentParameters, seeds)
+        keys.append((key, parameters))
+        cached = readCache(os.path.join(cacheDir, key + ".json"))
+        if cached is not None:
+            results[key] = cached
+        else:
+            jobs.append((key, parameters, opponentParameters, seeds))
+
+    print("{} configurations, {} cached, {} to simulate.".format(len(keys), len(keys) - len(jobs), len(jobs)))
+
+    if jobs != []:
+        with multiprocessing.Pool(processes, initializer = simulator.quiet) as pool:
+            for key, parameters, summary in pool.imap_unordered(runConfiguration, jobs):
+                writeCache(os.path.join(cacheDir, key + ".json"), {"parameters": parameters, "opponentParameters": opponentParameters, "seeds": [seeds[0], seeds[-1]], "results": summary})
+                results[key] = summary
+
+    return [(parameters, results[key]) for key, parameters in keys]
+
+def parseRange(text):
+    """
+    Parses "3:6" as 3, 4, 5, 6 and "1,2,4" as 1, 2, 4.
+    """
+    if ":" in text:
+        low, high = text.split(":")
+        return list(range(int(low), int(high) + 1))
+    return [int(value) for value in text.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description = "Sweep Moon Elf parameters against a default Moon Elf.")
+    parser.add_argument("--param", action = "append", default = [], help = "name=values, e.g. longbow3Damage=3:6 or blindThreshold=1,2")
+    parser.add_argument("--games", type = int, default = 200)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--processes", type = int, default = None)
+    parser.add_argument("--cache", default = "balanceCache")
+    args = parser.parse_args()
+
+    ranges = {}
+    for param in args.param:
+        name, values = param.split("=")
+        ranges[name] = parseRange(values)
+
+    for parameters, summary in sweep(ranges, args.games, args.seed, processes = args.processes, cacheDir = args.cache):
+        print("{}: win rate {:.3f}, damage dealt {:.1f}, taken {:.1f}, turns {:.1f}".format(
+            parameters, summary["winRate"], summary["meanDamageDealt"], summary["meanDamageTaken"], summary["meanTurns"]))
+
+if __name__ == "__main__":
+    main()
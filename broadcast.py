@@ -0,0 +1,188 @@
+"""
+Delta-encoded game state for spectators and clients.
+
+A StateBroadcaster watches two heroes and, whenever it is updated, sends subscribers only what changed
+since the previous update, e.g. dice 2 and 4 now showing 5 and 1, health -7, +Targeted. Every frame
+carries a sequence number, and a full keyframe is sent every keyframeInterval frames. Each frame is
+serialized once and the same bytes are handed to every subscriber.
+
+Frames are compact json:
+    {"s": 12, "k": [hero, hero]}      keyframe, each hero a full state
+    {"s": 13, "d": [op, op, ...]}     delta, each op a list starting with its kind and player:
+        ["hp", player, change]
+        ["cp", player, change]
+        ["dice", player, [[index, value], ...]]
+        ["lock", player, [[index, locked], ...]]
+        ["rolls", player, rolls]
+        ["+", player, condition name]
+        ["-", player, condition name]
+"""
+
+import json
+
+def heroState(hero):
+    """
+    Returns the broadcast state of a hero as a json friendly dict.
+    """
+    return {
+        "name": hero.name,
+        "health": hero.health,
+        "cp": hero.cp,
+        "rolls": hero.rolls,
+        "dice": [dice.value for dice in hero.dice],
+        "locks": [dice.locked for dice in hero.dice],
+        "conditions": [condition.name for condition in hero.conditions],
+    }
+
+def diffStates(old, new):
+    """
+    Returns the delta ops turning the old list of hero states into the new one.
+    """
+    ops = []
+    for player in range(len(new)):
+        before = old[player]
+        after = new[player]
+
+        if after["health"] != before["health"]:
+            ops.append(["hp", player, after["health"] - before["health"]])
+        if after["cp"] != before["cp"]:
+            ops.append(["cp", player, after["cp"] - before["cp"]])
+        if after["rolls"] != before["rolls"]:
+            ops.append(["rolls", player, after["rolls"]])
+
+        changed = [[i, after["dice"][i]] for i in range(len(after["dice"])) if after["dice"][i] != before["dice"][i]]
+        if changed != []:
+            ops.append(["dice", player, changed])
+        changed = [[i, after["locks"][i]] for i in range(len(after["locks"])) if after["locks"][i] != before["locks"][i]]
+        if changed != []:
+            ops.append(["lock", player, changed])
+
+        remaining = before["conditions"].copy()
+        for name in after["conditions"]:
+            if name in remaining:
+                remaining.remove(name)
+            else:
+                ops.append(["+", player, name])
+        for name in remaining:
+            ops.append(["-", player, name])
+
+    return ops
+
+def applyOps(states, ops):
+    """
+    Applies delta ops to a list of hero states in place.
+    """
+    for op in ops:
+        kind, state = op[0], states[op[1]]
+        if kind == "hp":
+            state["health"] += op[2]
+        elif kind == "cp":
+            state["cp"] += op[2]
+        elif kind == "rolls":
+            state["rolls"] = op[2]
+        elif kind == "dice":
+            for index, value in op[2]:
+                state["dice"][index] = value
+        elif kind == "lock":
+            for index, locked in op[2]:
+                state["locks"][index] = locked
+        elif kind == "+":
+            state["conditions"].append(op[2])
+        elif kind == "-":
+            state["conditions"].remove(op[2])
+
+def encodeFrame(frame):
+    return json.dumps(frame, separators = (",", ":")).encode()
+
+class StateBroadcaster:
+    """
+    Produces delta frames for a game and fans them out to subscribers.
+
+    Attributes:
+        heroes (list of Hero objects): The players being watched.
+        subscribers (list of callables): Called with the bytes of every frame.
+        keyframeInterval (int): Frames between keyframes.
+        sequence (int): Sequence number of the latest frame.
+        states (list of dicts): Hero states as of the latest frame.
+        backlog (list of bytes): The latest keyframe and every delta since, sent to new subscribers.
+    """
+
+    def __init__(self, heroes, keyframeInterval = 50):
+        self.heroes = heroes
+        self.subscribers = []
+        self.keyframeInterval = keyframeInterval
+        self.sequence = -1
+        self.states = None
+        self.backlog = []
+
+    def subscribe(self, callback):
+        """
+        Adds a subscriber and catches it up from the latest keyframe.
+        """
+        self.subscribers.append(callback)
+        for frame in self.backlog:
+            callback(frame)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def attach(self, renderer):
+        """
+        Updates after every narrated game event, catching changes made partway through an ability.
+        """
+        renderer.subscribe(lambda event, message: self.update())
+
+    def update(self):
+        """
+        Compares the heroes against the last frame and sends whatever changed.
+
+        Returns:
+            bytes: The frame sent, or None if nothing changed.
+        """
+        states = [heroState(hero) for hero in self.heroes]
+
+        if self.states is None or (self.sequence + 1) % self.keyframeInterval == 0:
+            frame = encodeFrame({"s": self.sequence + 1, "k": states})
+            self.backlog = []
+        else:
+            ops = diffStates(self.states, states)
+            if ops == []:
+                return None
+            frame = encodeFrame({"s": self.sequence + 1, "d": ops})
+
+        self.sequence += 1
+        self.states = states
+        self.backlog.append(frame)
+        for callback in self.subscribers:
+            callback(frame)
+        return frame
+
+class Spectator:
+    """
+    Rebuilds game state from broadcast frames. Frames received after a gap are ignored until the next keyframe.
+
+    Attributes:
+        states (list of dicts): Hero states, or None before the first keyframe.
+        sequence (int): Sequence number of the last applied frame.
+    """
+
+    def __init__(self):
+        self.states = None
+        self.sequence = -1
+
+    def receive(self, data):
+        """
+        Returns:
+            bool: Whether the frame was applied.
+        """
+        frame = json.loads(data)
+
+        if "k" in frame:
+            self.states = frame["k"]
+        elif self.states is None or frame["s"] != self.sequence + 1:
+            return False
+        else:
+            applyOps(self.states, frame["d"])
+
+        self.sequence = frame["s"]
+        return True
@@ -0,0 +1,205 @@
+"""
+A/B comparisons of Moon Elf variants with common random numbers.
+
+Both variants play the same seeds against the same opponent. Every dice is reseeded for each step of
+each turn (see simulator.seedDice), so the two variants see the same offensive rolls on the same turn
+even after their games have diverged, and most of the luck cancels out of the difference. With antithetic pairs, each seed is also played with
+every roll mirrored (v becomes 7 - v), balancing lucky and unlucky rolls within a seed.
+
+The difference is reported with a paired confidence interval, along with how many independent games
+would have been needed for the same precision. Besides win rate and damage, the damage dealt by every
+ability is compared per game.
+
+Seeds are played in shards. In sequential mode the intervals are checked as shards arrive, and the
+batch stops once the win rate difference is significant or the requested precision is reached, so
+--games becomes an upper bound. Significance is tested at a Bonferroni corrected level across every
+possible look, keeping the overall error rate at the requested level.
+
+Example:
+    python compare.py --a coveredShotDamage=7 --b coveredShotDamage=8 --games 2000
+    python compare.py --b missedMeBlockFeet=3 --games 20000 --significance 0.05
+    python compare.py --b coveredShotDamage=8 --games 20000 --win-precision 0.01 --damage-precision 0.1
+"""
+
+import argparse
+import math
+import statistics
+
+import diceThrone
+import simulator
+
+METRICS = ["win", "damageDealt", "damageTaken"]
+Z = 1.96 #95% confidence
+
+def playGame(parameters, opponentParameters, seed, antithetic):
+    heroes = [diceThrone.createMoonElf("Variant", parameters), diceThrone.createMoonElf("Opponent", opponentParameters)]
+    result = simulator.simulateGame(heroes, seed, antithetic = antithetic)
+
+    game = {"win": int(result["winner"] == 0), "damageDealt": result["damage"][0], "damageTaken": result["damage"][1]}
+    for name in result["abilityDamage"][0]:
+        game["ability:" + name] = result["abilityDamage"][0][name]
+    return game
+
+def playSeed(job):
+    """
+    Plays both variants on one seed, and on its antithetic mirror if asked. Runs in a worker process.
+
+    Returns:
+        tuple: Lists of per-game metrics for variant A and for variant B, in matching order.
+    """
+    parametersA, parametersB, opponentParameters, seed, antithetic = job
+
+    mirrors = [False, True] if antithetic else [False]
+    gamesA = [playGame(parametersA, opponentParameters, seed, mirror) for mirror in mirrors]
+    gamesB = [playGame(parametersB, opponentParameters, seed, mirror) for mirror in mirrors]
+    return gamesA, gamesB
+
+def playShard(job):
+    """
+    Plays a shard of seeds with playSeed. Runs in a worker process.
+    """
+    parametersA, parametersB, opponentParameters, seeds, antithetic = job
+    return [playSeed((parametersA, parametersB, opponentParameters, seed, antithetic)) for seed in seeds]
+
+def abilityMetrics(units):
+    names = set()
+    for gamesA, gamesB in units:
+        for game in gamesA + gamesB:
+            names.update(metric for metric in game if metric.startswith("ability:"))
+    return sorted(names)
+
+def summarize(units, z = Z):
+    """
+    Turns per-seed results into paired estimates.
+
+    Parameters:
+        units (list of tuples): (games of A, games of B) for every seed.
+        z (float): Normal quantile of the confidence intervals.
+
+    Returns:
+        dict: For every metric, the means, the difference B - A, its confidence interval and the variance reduction.
+    """
+    n = len(units)
+    gamesPerUnit = len(units[0][0])
+    summary = {"seeds": n, "games": 2 * n * gamesPerUnit, "confidence": 2 * statistics.NormalDist().cdf(z) - 1, "metrics": METRICS + abilityMetrics(units)}
+
+    for metric in summary["metrics"]:
+        perGameA = [game.get(metric, 0) for gamesA, gamesB in units for game in gamesA]
+        perGameB = [game.get(metric, 0) for gamesA, gamesB in units for game in gamesB]
+        differences = [statistics.fmean(game.get(metric, 0) for game in gamesB) - statistics.fmean(game.get(metric, 0) for game in gamesA) for gamesA, gamesB in units]
+
+        meanDifference = statistics.fmean(differences)
+        pairedVariance = statistics.variance(differences) / n if n > 1 else 0
+        independentVariance = (statistics.variance(perGameA) + statistics.variance(perGameB)) / len(perGameA) if n > 1 else 0
+        halfWidth = z * math.sqrt(pairedVariance)
+
+        summary[metric] = {
+            "a": statistics.fmean(perGameA),
+            "b": statistics.fmean(perGameB),
+            "difference": meanDifference,
+            "interval": (meanDifference - halfWidth, meanDifference + halfWidth),
+            "halfWidth": halfWidth,
+            "independentInterval": (meanDifference - z * math.sqrt(independentVariance), meanDifference + z * math.sqrt(independentVariance)),
+            "varianceReduction": independentVariance / pairedVariance if pairedVariance > 0 else math.inf,
+        }
+
+    return summary
+
+def targetReached(summary, winPrecision = None, damagePrecision = None, significance = None):
+    """
+    Checks a summary against the sequential stopping rules.
+
+    Returns:
+        bool: True if the win rate difference is significant, or if every precision requested is met.
+    """
+    win = summary["win"]
+    if significance is not None and (win["interval"][0] > 0 or win["interval"][1] < 0):
+        return True
+
+    if winPrecision is None and damagePrecision is None:
+        return False
+    if winPrecision is not None and win["halfWidth"] > winPrecision:
+        return False
+    if damagePrecision is not None:
+        for metric in summary["metrics"]:
+            if metric.startswith("ability:") and summary[metric]["halfWidth"] > damagePrecision:
+                return False
+    return True
+
+def compare(parametersA = {}, parametersB = {}, games = 1000, firstSeed = 0, antithetic = True, opponentParameters = {}, processes = None,
+            winPrecision = None, damagePrecision = None, significance = None, shardSize = 50):
+    """
+    Compares two Moon Elf variants against the same opponent on common random numbers.
+
+    Giving any of winPrecision, damagePrecision or significance turns on sequential mode, where games is
+    the most seeds played and the batch stops as soon as targetReached is satisfied.
+
+    Parameters:
+        parametersA (dict): Moon Elf parameters of variant A, see diceThrone.moonElfDefaults.
+        parametersB (dict): Moon Elf parameters of variant B.
+        games (int): Seeds to play. Each seed is played by both variants, twice each with antithetic pairs.
+        firstSeed (int): Seed of the first game.
+        antithetic (bool): Also play every seed with mirrored rolls.
+        opponentParameters (dict): Parameters of the opponent both variants face.
+        processes (int): Worker processes. Defaults to the number of cores.
+        winPrecision (float): Largest acceptable half width of the win rate difference interval.
+        damagePrecision (float): Largest acceptable half width of every per-ability damage difference interval.
+        significance (float): Stop once the win rate difference is significant at this level.
+        shardSize (int): Seeds per unit of work, and between checks of the stopping rules.
+
+    Returns:
+        dict: See summarize, plus whether the batch stopped early.
+    """
+    seeds = list(range(firstSeed, firstSeed + games))
+    shards = [(parametersA, parametersB, opponentParameters, seeds[i : i + shardSize], antithetic) for i in range(0, games, shardSize)]
+
+    z = Z
+    if significance is not None:
+        z = statistics.NormalDist().inv_cdf(1 - significance / (2 * len(shards)))
+
+    sequential = winPrecision is not None or damagePrecision is not None or significance is not None
+    def stop(results):
+        if not sequential or len(results) < 2:
+            return False
+        return targetReached(summarize([unit for shard in results for unit in shard], z), winPrecision, damagePrecision, significance)
+
+    results = simulator.runShards(playShard, shards, stop, processes)
+
+    summary = summarize([unit for shard in results for unit in shard], z)
+    summary["maxSeeds"] = games
+    summary["stoppedEarly"] = len(results) < len(shards)
+    return summary
+
+def parseParameters(items):
+    parameters = {}
+    for item in items:
+        name, value = item.split("=")
+        parameters[name] = int(value)
+    return parameters
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare two Moon Elf variants with common random numbers.")
+    parser.add_argument("--a", action = "append", default = [], help = "name=value for variant A, defaults otherwise")
+    parser.add_argument("--b", action = "append", default = [], help = "name=value for variant B, defaults otherwise")
+    parser.add_argument("--games", type = int, default = 1000)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--no-antithetic", dest = "antithetic", action = "store_false")
+    parser.add_argument("--processes", type = int, default = None)
+    parser.add_argument("--win-precision", dest = "winPrecision", type = float, default = None)
+    parser.add_argument("--damage-precision", dest = "damagePrecision", type = float, default = None)
+    parser.add_argument("--significance", type = float, default = None)
+    parser.add_argument("--shard-size", dest = "shardSize", type = int, default = 50)
+    args = parser.parse_args()
+
+    summary = compare(parseParameters(args.a), parseParameters(args.b), args.games, args.seed, args.antithetic, processes = args.processes,
+                      winPrecision = args.winPrecision, damagePrecision = args.damagePrecision, significance = args.significance, shardSize = args.shardSize)
+
+    print("{} seeds, {} games{}.".format(summary["seeds"], summary["games"], ", stopped early out of {} seeds".format(summary["maxSeeds"]) * summary["stoppedEarly"]))
+    for metric in summary["metrics"]:
+        result = summary[metric]
+        print("{}: A {:.3f}, B {:.3f}, B - A {:+.3f}, paired {:.4g}% CI [{:+.3f}, {:+.3f}] (independent [{:+.3f}, {:+.3f}], {:.1f}x fewer games)".format(
+            metric, result["a"], result["b"], result["difference"], summary["confidence"] * 100, result["interval"][0], result["interval"][1],
+            result["independentInterval"][0], result["independentInterval"][1], result["varianceReduction"]))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,110 @@
 import random
+import copy
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 debug = True
 gameOutput = True
 
+class Renderer:
+    """
+    Recieves game narration and passes it on to subscribers, such as the GUI.
+
+    Narration is emitted as an event name, a format template and its arguments. Nothing is formatted
+    unless a subscriber or sink will read it. Callable arguments are called at format time, so expensive
+    descriptions like Hero.displayDice can be passed without being built.
+
+    Attributes:
+        subscribers (list of callables): Called with (event, message) for every narration.
+    """
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def format(self, template, args):
+        return template.format(*[arg() if callable(arg) else arg for arg in args])
+
+    def emit(self, event, template, *args):
+        if self.subscribers == []:
+            return
+
+        message = self.format(template, args)
+        for callback in self.subscribers:
+            callback(event, message)
+
+    def write(self, message):
+        pass
+
+    def flush(self):
+        pass
+
+class NullRenderer(Renderer):
+    """
+    Discards all narration. Used for headless games.
+    """
+
+class BufferedRenderer(Renderer):
+    """
+    Writes narration to a stream, one line per event, in batches of bufferSize lines.
+
+    Attributes:
+        stream (file object): Where narration is written.
+        bufferSize (int): Lines held before they are written out.
+        buffer (list of str): Lines waiting to be written.
+    """
+
+    def __init__(self, stream, bufferSize = 64):
+        super().__init__()
+        self.stream = stream
+        self.bufferSize = bufferSize
+        self.buffer = []
+
+    def emit(self, event, template, *args):
+        message = self.format(template, args)
+        for callback in self.subscribers:
+            callback(event, message)
+        self.write(message)
+
+    def write(self, message):
+        self.buffer.append(message)
+        if len(self.buffer) >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        if self.buffer != []:
+            self.stream.write("\n".join(self.buffer) + "\n")
+            self.buffer = []
+        self.stream.flush()
+
+class ConsoleRenderer(BufferedRenderer):
+    """
+    Narrates to stdout. Interactive games use a bufferSize of 1 and flush before asking for input.
+    """
+
+    def __init__(self, bufferSize = 1):
+        super().__init__(sys.stdout, bufferSize)
+
+class FileRenderer(BufferedRenderer):
+    """
+    Narrates to a text file.
+    """
+
+    def __init__(self, path, bufferSize = 1024):
+        super().__init__(open(path, "w"), bufferSize)
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+renderer = ConsoleRenderer()
+
 class Hero:
     """
     The "Player" class, holding all relevant information to a player.
@@ -15,6 +117,7 @@ class Hero:
         conditions (list of Condition objects): Conditions afflicting the hero
         cp (int): Combat points avalible.
         rolls (int): Number of rolls left
+        policy (policy object): Makes the hero's decisions instead of the console, or None
     """
 
     def __init__(self, health = 50, name = "Unnamed Hero", dice = [], abilities = [], conditions = [], cp = 2):
@@ -33,6 +136,7 @@ class Hero:
         self.conditions = conditions
         self.cp = cp
         self.rolls = 0
+        self.policy = None
 
     def __str__(self):
         output = "Name: {}".format(self.name)
@@ -57,8 +161,7 @@ class Hero:
 
     def displayDice(self):
         output = ""
-        self.sortDice()
-        for dice in self.dice:
+        for dice in sorted(self.dice, key = lambda dice: dice.value): #Sorted copy, so describing the dice never changes their order
             output += str(dice) + ", "
         return output[:-2]
 
@@ -73,7 +176,7 @@ class Hero:
             source (Hero): The source of the damage.
             sourceType (string): The type of damage source.
         """
-        global debug, gameOutput
+        global debug, renderer
 
         if sourceType == "Attack":
             amount += self.triggerCondition("AttackDamage") #Implied to change attack modifier, current use is for Targeted
@@ -92,12 +195,11 @@ class Hero:
         self.health = self.health + amount
 
         if debug: print(" === [{} Hero Object]: Changing health by {}.".format(self.name, amount))
-        if gameOutput:
-            if amount <= 0: print("{} lost {} health!".format(self.name, amount * -1))
-            else: print("{} gained {} health!".format(self.name, amount))
+        if amount <= 0: renderer.emit("health", "{} lost {} health!", self.name, amount * -1)
+        else: renderer.emit("health", "{} gained {} health!", self.name, amount)
 
     def addCondition(self, condition):
-        global debug, gameOutput
+        global debug, renderer
         if debug: print(" === [{} Hero Object]: Attempting to add {} condition.".format(self.name, condition.name))
 
         stackLimit = condition.stackLimit
@@ -111,8 +213,8 @@ class Hero:
             if debug: print(" === [{} Hero Object]: Unable to add {} condition. Stack Limit: {}, Current Items: {}".format(self.name, condition.name, stackLimit, stack))
         else:
             if debug: print(" === [{} Hero Object]: Able to add {} condition. Stack Limit: {}, Current Items: {}".format(self.name, condition.name, stackLimit, stack))
-            if gameOutput: print("{}: Recieved {} condition.".format(self.name, condition.name))
             self.conditions.append(condition)
+            renderer.emit("condition", "{}: Recieved {} condition.", self.name, condition.name)
     
     def removeCondition(self, condition):
         self.conditions.remove(condition)
@@ -225,9 +327,9 @@ class Ability:
             return requirementList == []
 
     def use(self, target, amount = 0):
-        global debug, gameOutput
+        global debug, renderer
         if debug: print(" === [Ability Object]: Using ability [{}] on {}.".format(self.name, target.name))
-        if gameOutput: print("{}{}: Using {}ability {} on {}.".format(self.defense * "> ", self.host.name, self.defense * "defensive ", self.name, target.name))
+        renderer.emit("ability", "{}{}: Using {}ability {} on {}.", self.defense * "> ", self.host.name, self.defense * "defensive ", self.name, target.name)
 
         if self.defense:
             for action in self.actions:
@@ -291,20 +393,22 @@ class Inflict(Action): #Inflict Condition
         if debug: print (" === [Inflict Action Object]: Inflicting {} on {}".format(self.condition.name, target.name))
 
     def __str__(self):
-        return "Inflict {}".format(self.condition.name)
+        return "Inflict {}".format(str(self.condition))
 
 class RollEffect_MoonElf(Action): #Inflict Effect based on Roll
-    def __init__(self, dealer = ""):
+    def __init__(self, damage = 3, blindThreshold = 2, dealer = ""):
         super().__init__(dealer)
+        self.damage = damage
+        self.blindThreshold = blindThreshold
 
     def __str__(self):
-        return "Roll Effect"
+        return "Roll Effect ({} base damage), Inflict {}".format(self.damage, str(Blind(self.blindThreshold)))
 
     def act(self, target):
         global debug
         if debug: print (" === [RollEffect Action Object]: Rolling for effect.")
 
-        damage = 3
+        damage = self.damage
 
         for dice in self.dealer.dice:
             dice.roll()
@@ -321,8 +425,8 @@ class RollEffect_MoonElf(Action): #Inflict Effect based on Roll
                 if debug: print(" removing 1 cp.")
             
         if debug: print(" === [RollEffect Action Object]: dealing {} damage.".format(damage))
-        target.modifyHealth(damage, "Attack")
-        Inflict(Blind).act(target)
+        target.modifyHealth(-1 * damage, source = self.dealer, sourceType = "Attack")
+        Inflict(Blind(self.blindThreshold), self.dealer).act(target)
 
 class MissedMe_MoonElf(Action): #"Missed Me" Effect
     """
@@ -332,14 +436,15 @@ class MissedMe_MoonElf(Action): #"Missed Me" Effect
     For every 2 Arrow, deal 1 undefendable damage.
     """
 
-    def __init(self, dealer = ""):
+    def __init__(self, blockFeet = 2, dealer = ""):
         super().__init__(dealer)
+        self.blockFeet = blockFeet
 
     def __str__(self):
-        return "Roll Effect"
+        return "Roll Effect (block half on {} Foot)".format(self.blockFeet)
 
     def act(self, source, damageRecieved):
-        global debug, gameOutput
+        global debug, renderer
         if debug: print (" === [MissedMe Action Object]: Rolling for effect.")
 
         outputDamage = 0
@@ -349,10 +454,10 @@ class MissedMe_MoonElf(Action): #"Missed Me" Effect
             dice.roll()
             #if debug: print(" === [RollEffect Action Object]: {} rolled.".format(dice.side))
 
-        if gameOutput: print("> {}: Rolled: {}".format(self.dealer.name, self.dealer.displayDice()))
+        renderer.emit("defenseRoll", "> {}: Rolled: {}", self.dealer.name, self.dealer.displayDice)
 
         #Block half damage if two feet are rolled
-        condition = ["Foot", "Foot"] #TODO: Maybe make function to make dice checking more sussinct
+        condition = ["Foot"] * self.blockFeet #TODO: Maybe make function to make dice checking more sussinct
         for dice in self.dealer.dice:
             for item in condition:
                 if item == dice.side:
@@ -361,7 +466,7 @@ class MissedMe_MoonElf(Action): #"Missed Me" Effect
         if condition == []:
             trueDamage = damageRecieved - damageRecieved // 2
             if debug: print(" === [MissedMe Action Object] Reduced taken damage from {} to {}.".format(damageRecieved, trueDamage))
-            if gameOutput: print("> Half of incoming damage blocked!")
+            renderer.emit("block", "> Half of incoming damage blocked!")
             damageRecieved = trueDamage
 
         #Deal 1 undefendable for every two arrows
@@ -373,7 +478,7 @@ class MissedMe_MoonElf(Action): #"Missed Me" Effect
         outputDamage = arrows // 2
         if debug: print(" === [MissedMe Action Object] Retaliating {} undefendable damage".format(outputDamage))
         if outputDamage > 0:
-            if gameOutput: print("> {} damage retaliated!".format(outputDamage))
+            renderer.emit("retaliate", "> {} damage retaliated!", outputDamage)
             UndefendableDamage(outputDamage, self.dealer).act(source)
 
         return damageRecieved
@@ -414,6 +519,9 @@ class Condition:
     def act(self):
         return 0
 
+    def __str__(self):
+        return self.name
+
 class Targeted(Condition):
     """
     Negative Status Effect, Stack Limit: 1
@@ -424,14 +532,18 @@ class Targeted(Condition):
     Attack Modifier. Persistent.
     """
 
-    def __init__(self):
+    def __init__(self, bonus = 2):
         super().__init__(name = "Targeted", trigger = "AttackDamage", persistent = True)
+        self.bonus = bonus
     
     def act(self): #Add 2 Damage
         global debug
-        if debug: print (" === [{} Condition Object]: Modifying +2 damage to {}".format(self.name, self.owner.name))
+        if debug: print (" === [{} Condition Object]: Modifying +{} damage to {}".format(self.name, self.bonus, self.owner.name))
 
-        return -2 #Add to damage modifier
+        return -1 * self.bonus #Add to damage modifier
+
+    def __str__(self):
+        return "{} (+{})".format(self.name, self.bonus)
 
 class Entangle(Condition):
     """
@@ -463,26 +575,30 @@ class Blind(Condition):
     they must remove it and roll one dice. On 1-2, their offensive roll phase fails and has no effect of any kind.
     """ #Changed to checking before offensive roll phase
 
-    def __init__(self):
+    def __init__(self, threshold = 2):
         super().__init__(name = "Blind", trigger = "PreOffRoll")
+        self.threshold = threshold
 
     def act(self):
-        global debug, gameOutput
+        global debug, renderer
 
-        if debug: print(" === [{} Condition Object]: 1/3rd chance of skipping the offensive roll of {}".format(self.name, self.owner.name))
+        if debug: print(" === [{} Condition Object]: {}/6th chance of skipping the offensive roll of {}".format(self.name, self.threshold, self.owner.name))
 
         dice = self.owner.dice[0]
         dice.roll()
         
-        if gameOutput: print("> {}: {} Rolled for blindness effect.".format(self.owner.name, dice.value))
+        renderer.emit("blindRoll", "> {}: {} Rolled for blindness effect.", self.owner.name, dice.value)
 
-        if dice.value <= 2:
+        if dice.value <= self.threshold:
             if debug: print(" === [{} Condition Object]: Offensive turn skipped.".format(self.name))
-            if gameOutput: print("> {}: Offensive Roll Skipped!.".format(self.owner.name))
+            renderer.emit("blindSkip", "> {}: Offensive Roll Skipped!.", self.owner.name)
             return -418
         
         return 0
 
+    def __str__(self):
+        return "{} (1-{})".format(self.name, self.threshold)
+
 class Evasive(Condition):
     """
     Spend and Roll 1-2 Attack damage
@@ -491,30 +607,38 @@ class Evasive(Condition):
     If the outcome is 1-2, no damage is recieved. Multible tokens may be spent in an attempt to prevent the same source of damage.
     """ #Add "spend" conditional
 
-    def __init__(self):
+    def __init__(self, threshold = 2):
         super().__init__(name = "Evasive", trigger = "DamageTaken", stackLimit = 3, givenToSelf = True)
+        self.threshold = threshold
 
     def act(self):
         global debug
-        if debug: print(" === [{} Condition Object]: 1/3rd chance of avoiding all damage when spent.".format(self.name, self.owner.name))
+        if debug: print(" === [{} Condition Object]: {}/6th chance of avoiding all damage when spent.".format(self.name, self.threshold))
 
         self.persistent = True
 
-        if gameOutput: 
+        if self.owner.policy is not None:
+            if not self.owner.policy.spendEvasive(self.owner):
+                return 0
+        elif gameOutput: 
+            renderer.flush()
             i = input("{} has an evasive condition. Would they like to use it to deflect incoming damage? (Y/N): ".format(self.owner.name))
-            if i.lower == "n":
+            if i.lower() == "n":
                 return 0
         
         self.persistent = False
         dice = self.owner.dice[0]
         dice.roll()
 
-        if gameOutput: print("> {}: {} Rolled for evasive effect.".format(self.owner.name, dice.value))
+        renderer.emit("evasiveRoll", "> {}: {} Rolled for evasive effect.", self.owner.name, dice.value)
 
-        if dice.value <= 2:
-            if gameOutput: print("All damage avoided!")
+        if dice.value <= self.threshold:
+            renderer.emit("evasiveAvoid", "All damage avoided!")
             return 1
         return 0
+
+    def __str__(self):
+        return "{} (1-{})".format(self.name, self.threshold)
 # ========= Dice
 
 class Dice:
@@ -523,12 +647,13 @@ class Dice:
         self.sides = sides
         self.side = self.sides[self.value - 1]
         self.locked = False
+        self.rng = random #Anything with randint, replaced by simulations needing their own dice streams
 
     def roll(self):
         global debug
 
         if not self.locked:
-            self.value = random.randint(1, 6)
+            self.value = self.rng.randint(1, 6)
             self.side = self.sides[self.value - 1]
             if debug: print(" === [Dice Object]: {} rolled.".format(str(self)))
 
@@ -549,51 +674,94 @@ class Dice:
             return "<{} - {}>".format(self.value, self.side)
         return "[{} - {}]".format(self.value, self.side)
 
-def consoleGame():
-    global debug, gameOutput
-    debug = False
-    gameOutput = True
+# ========= Heroes
+
+moonElfDefaults = {
+    "longbow3Damage": 4,
+    "longbow4Damage": 5,
+    "longbow5Damage": 7,
+    "demisingShotDamage": 4,
+    "coveredShotDamage": 7,
+    "explodingArrowDamage": 3,
+    "entanglingShotDamage": 7,
+    "eclipseDamage": 7,
+    "blindingShotDamage": 8,
+    "lunarEclipseDamage": 12,
+    "targetedBonus": 2,
+    "blindThreshold": 2,
+    "evasiveThreshold": 2,
+    "missedMeBlockFeet": 2,
+}
+
+def createMoonElf(name = "Moon Elf", parameters = {}):
+    """
+    Builds a Moon Elf with its own dice, abilities and conditions.
 
-    with open("asciiart.txt", "r") as f:
-        print(f.read())
+    Parameters:
+        name (str): The name of the Hero.
+        parameters (dict): Overrides for any of the numbers in moonElfDefaults.
+
+    Returns:
+        Hero: A fresh Moon Elf.
+    """
+    p = moonElfDefaults.copy()
+    for key in parameters:
+        if key not in p:
+            raise KeyError("Unknown Moon Elf parameter: {}".format(key))
+        p[key] = parameters[key]
 
     #Generate Dice for Moon Elf
     moonDice = []
-    moonCloneDice = []
     for i in range(5):
         moonDice.append(Dice(["Arrow", "Arrow", "Arrow", "Foot", "Foot", "Moon"]))
-        moonCloneDice.append(Dice(["Arrow", "Arrow", "Arrow", "Foot", "Foot", "Moon"]))
 
     #Add Moon Elf abilities
-    longbow3 = Ability("Longbow 3", ["Arrow", "Arrow", "Arrow"], [Damage(4)])
-    longbow4 = Ability("Longbow 4", ["Arrow", "Arrow", "Arrow", "Arrow"], [Damage(5)])
-    longbow5 = Ability("Longbow 5", ["Arrow", "Arrow", "Arrow", "Arrow", "Arrow"], [Damage(7)])
-    demisingShot = Ability("Demising Shot", ["Arrow", "Arrow", "Arrow", "Moon", "Moon"], [Inflict(Targeted()), Damage(4)])
-    coveredShot = Ability("Covered Shot", ["Arrow", "Arrow", "Foot", "Foot", "Foot"], [Inflict(Evasive()), Damage(7)]) #TODO: Replace evasive
-    explodingArrow = Ability("Exploding Arrow", ["Arrow", "Moon", "Moon", "Moon"], [RollEffect_MoonElf()])
-    entanglingShot = Ability("Entangling Shot", 4, actions = [Inflict(Entangle()), Damage(7)])
-    eclipse = Ability("Eclipse", ["Moon", "Moon", "Moon", "Moon"], [Inflict(Blind()), Inflict(Entangle()), Inflict(Targeted()), Damage(7)])
-    blindingShot = Ability("Blinding Shot", 5, actions = [Inflict(Blind()), Inflict(Evasive()), Damage(8)]) #TODO: Replace blind
-    missedMe = Ability("Missed Me", 0,  [MissedMe_MoonElf()], defense = True)
-    lunarEclipse = Ability("Lunar Eclipse", ["Moon", "Moon", "Moon", "Moon", "Moon"], [Inflict(Evasive()), Inflict(Blind()), Inflict(Entangle()), Inflict(Targeted()), UndefendableDamage(12)], ultimate = True)
+    longbow3 = Ability("Longbow 3", ["Arrow", "Arrow", "Arrow"], [Damage(p["longbow3Damage"])])
+    longbow4 = Ability("Longbow 4", ["Arrow", "Arrow", "Arrow", "Arrow"], [Damage(p["longbow4Damage"])])
+    longbow5 = Ability("Longbow 5", ["Arrow", "Arrow", "Arrow", "Arrow", "Arrow"], [Damage(p["longbow5Damage"])])
+    demisingShot = Ability("Demising Shot", ["Arrow", "Arrow", "Arrow", "Moon", "Moon"], [Inflict(Targeted(p["targetedBonus"])), Damage(p["demisingShotDamage"])])
+    coveredShot = Ability("Covered Shot", ["Arrow", "Arrow", "Foot", "Foot", "Foot"], [Inflict(Evasive(p["evasiveThreshold"])), Damage(p["coveredShotDamage"])]) #TODO: Replace evasive
+    explodingArrow = Ability("Exploding Arrow", ["Arrow", "Moon", "Moon", "Moon"], [RollEffect_MoonElf(p["explodingArrowDamage"], p["blindThreshold"])])
+    entanglingShot = Ability("Entangling Shot", 4, actions = [Inflict(Entangle()), Damage(p["entanglingShotDamage"])])
+    eclipse = Ability("Eclipse", ["Moon", "Moon", "Moon", "Moon"], [Inflict(Blind(p["blindThreshold"])), Inflict(Entangle()), Inflict(Targeted(p["targetedBonus"])), Damage(p["eclipseDamage"])])
+    blindingShot = Ability("Blinding Shot", 5, actions = [Inflict(Blind(p["blindThreshold"])), Inflict(Evasive(p["evasiveThreshold"])), Damage(p["blindingShotDamage"])]) #TODO: Replace blind
+    missedMe = Ability("Missed Me", 0,  [MissedMe_MoonElf(p["missedMeBlockFeet"])], defense = True)
+    lunarEclipse = Ability("Lunar Eclipse", ["Moon", "Moon", "Moon", "Moon", "Moon"], [Inflict(Evasive(p["evasiveThreshold"])), Inflict(Blind(p["blindThreshold"])), Inflict(Entangle()), Inflict(Targeted(p["targetedBonus"])), UndefendableDamage(p["lunarEclipseDamage"])], ultimate = True)
 
     moonAbilities = [longbow3, longbow4, longbow5, demisingShot, coveredShot, explodingArrow, \
                     entanglingShot, eclipse, blindingShot, missedMe, lunarEclipse]
 
-    moonCloneAbilities = moonAbilities.copy()
+    return Hero(name = name, dice = moonDice, abilities = moonAbilities, conditions = [])
+
+def consoleGame(policy = None):
+    """
+    Plays a game between two Moon Elves on the console.
+
+    Parameters:
+        policy (policy object): Makes the second player's decisions, such as a trained policy from trainer.py.
+            None lets both players be controlled from the console.
+    """
+    global debug, gameOutput, renderer
+    debug = False
+    gameOutput = True
+
+    with open("asciiart.txt", "r") as f:
+        renderer.write(f.read())
 
     #Main Game Loop
 
-    moonElf = Hero(name = "Good Moon Elf", dice = moonDice, abilities = moonAbilities, conditions = [])
-    moonElfClone = Hero(name = "Evil Moon Elf", dice = moonCloneDice, abilities = moonCloneAbilities, conditions = [])
+    moonElf = createMoonElf("Good Moon Elf")
+    moonElfClone = createMoonElf("Evil Moon Elf")
+
+    moonElfClone.policy = policy
 
     players = [moonElf, moonElfClone]
 
     def printPlayers(players):
-        print("\n" + "=" * 50 + "\n")
+        renderer.write("\n" + "=" * 50 + "\n")
         for player in players:
-            print(player + "\n")
-        print("\n" + "=" * 50 + "\n")
+            renderer.write(player + "\n")
+        renderer.write("\n" + "=" * 50 + "\n")
 
     running = True
     currentPlayer = players[0]
@@ -622,41 +790,41 @@ def consoleGame():
         #Main Phase 1
 
         #Round Start
-        print("=" * 50)
-        print("ROUND {}, {}'s TURN".format(turncount // len(players), currentPlayer.name))
-        print("=" * 50)
+        renderer.write("=" * 50)
+        renderer.write("ROUND {}, {}'s TURN".format(turncount // len(players), currentPlayer.name))
+        renderer.write("=" * 50)
 
         i = 0
         for player in players:
             i += 1
-            print("Player {}:".format(i))
-            print("\n" + str(player) + "\n")
-        print("=" * 50)    
+            renderer.write("Player {}:".format(i))
+            renderer.write("\n" + str(player) + "\n")
+        renderer.write("=" * 50)    
         
         #print("-" * 50)
         #print("MAIN PHASE 1")
         #print("-" * 50)
 
         #Offensive Roll Phase
-        print("-" * 50)
-        print("OFFENSIVE ROLL PHASE")
-        print("-" * 50)
+        renderer.write("-" * 50)
+        renderer.write("OFFENSIVE ROLL PHASE")
+        renderer.write("-" * 50)
 
         currentPlayer.rolls = 3
         for dice in currentPlayer.dice:
             dice.locked = False
 
-        if currentPlayer.triggerCondition("PreOffRoll") == -418: #Trigger Pre-Offensive-Roll Condtions
+        skipped = currentPlayer.triggerCondition("PreOffRoll") == -418 #Trigger Pre-Offensive-Roll Condtions
+        if skipped:
             currentPlayer.rolls = 0
 
         while currentPlayer.rolls > 0:
 
-            print("\n{}: Offensive Roll: ".format(currentPlayer.name), end = "")
-
             for dice in currentPlayer.dice:
                 dice.roll()
 
-            print(currentPlayer.displayDice())
+            currentPlayer.sortDice() #Dice are numbered for freezing in the order they are shown
+            renderer.write("\n{}: Offensive Roll: {}".format(currentPlayer.name, currentPlayer.displayDice()))
             currentPlayer.rolls -= 1
 
             if(currentPlayer.rolls > 0):
@@ -664,29 +832,44 @@ def consoleGame():
                 output = ""
                 for ability in currentPlayer.getValidAbilities():
                     output += ability.name + ", "
-                print("\nAvailable abilities: {}".format(output[:-2]))
+                renderer.write("\nAvailable abilities: {}".format(output[:-2]))
 
-                print("{} Possible Reroll{}.".format(currentPlayer.rolls, "s" * (currentPlayer.rolls != 1)))
+                renderer.write("{} Possible Reroll{}.".format(currentPlayer.rolls, "s" * (currentPlayer.rolls != 1)))
+
+                if currentPlayer.policy is not None:
+                    locks = currentPlayer.policy.chooseLocks(currentPlayer, players[(turncount + 1) % len(players)])
+                    for i in range(5):
+                        currentPlayer.dice[i].locked = locks[i]
+                    continue
+
+                renderer.flush()
                 diceInput = input("Input Dice To Freeze / Unfreeze (Numbers 1-5): ") #TODO: Make easier for player
                 for i in range(5):
                     if str(i + 1) in diceInput:
                         currentPlayer.dice[i].locked = not currentPlayer.dice[i].locked
 
-        print()
+        renderer.write("")
 
-        avalibleAbilities = currentPlayer.getValidAbilities()
+        avalibleAbilities = []
+        if not skipped:
+            avalibleAbilities = currentPlayer.getValidAbilities()
         if avalibleAbilities == []:
-            print("No avalibile abilities are possible.")
+            renderer.write("No avalibile abilities are possible.")
+        elif currentPlayer.policy is not None:
+            ability = currentPlayer.policy.chooseAbility(currentPlayer, players[(turncount + 1) % len(players)], avalibleAbilities)
+            if ability is not None:
+                ability.use(players[(turncount + 1) % len(players)])
         else:
-            print("Choose one of the following abilities: ")
+            renderer.write("Choose one of the following abilities: ")
             for i in range(len(avalibleAbilities)):
-                print("{}. {}".format(str(i + 1), avalibleAbilities[i].name))
+                renderer.write("{}. {}".format(str(i + 1), avalibleAbilities[i].name))
 
+            renderer.flush()
             try:
                 abilityNum = int(input("Select Ability: ")) - 1
             except:
                 abilityNum = 0
-            print()
+            renderer.write("")
             avalibleAbilities[abilityNum].use(players[(turncount + 1) % len(players)])
 
         #Defensive Roll Phase
@@ -708,123 +891,220 @@ def consoleGame():
         turncount += 1
         currentPlayer = players[turncount % len(players)]
 
-# =========== GUI
+class BackgroundWorker:
+    """
+    Runs engine computations off the Tk thread and posts the results back through root.after.
+
+    Requests are keyed; submitting a new request under a key cancels or discards any older
+    request under the same key, so only the result matching the latest dice state is delivered.
+
+    Attributes:
+        root (Tk): The window whose event loop recieves the results.
+        executor (ThreadPoolExecutor): Pool the computations run on.
+        generations (dict): Latest request number for every key.
+        pending (dict): Latest future for every key.
+        finished (Queue): Completed futures waiting to be handed to the Tk thread.
+        pollDelay (int): Milliseconds between checks for completed work.
+    """
+
+    def __init__(self, root, workers = 1, pollDelay = 20):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers = workers)
+        self.generations = {}
+        self.pending = {}
+        self.finished = queue.Queue()
+        self.pollDelay = pollDelay
+        self.running = True
+        self.root.after(self.pollDelay, self.poll)
+
+    def submit(self, key, function, callback, *args):
+        """
+        Runs function(*args) in the background and calls callback(result) on the Tk thread.
+
+        Parameters:
+            key (str): Requests sharing a key replace each other.
+            function (callable): The computation to run. Must not touch any widgets.
+            callback (callable): Called with the result, only if no newer request was made.
+        """
+        global debug
 
-#Create moon elf
-moonDice = []
-for i in range(5):
-    moonDice.append(Dice(["Arrow", "Arrow", "Arrow", "Foot", "Foot", "Moon"]))
-#Add Moon Elf abilities
-longbow3 = Ability("Longbow 3", ["Arrow", "Arrow", "Arrow"], [Damage(4)])
-longbow4 = Ability("Longbow 4", ["Arrow", "Arrow", "Arrow", "Arrow"], [Damage(5)])
-longbow5 = Ability("Longbow 5", ["Arrow", "Arrow", "Arrow", "Arrow", "Arrow"], [Damage(7)])
-demisingShot = Ability("Demising Shot", ["Arrow", "Arrow", "Arrow", "Moon", "Moon"], [Inflict(Targeted()), Damage(4)])
-coveredShot = Ability("Covered Shot", ["Arrow", "Arrow", "Foot", "Foot", "Foot"], [Inflict(Evasive()), Damage(7)])
-explodingArrow = Ability("Exploding Arrow", ["Arrow", "Moon", "Moon", "Moon"], [RollEffect_MoonElf()])
-entanglingShot = Ability("Entangling Shot", 4, actions = [Inflict(Entangle()), Damage(7)])
-eclipse = Ability("Eclipse", ["Moon", "Moon", "Moon", "Moon"], [Inflict(Blind()), Inflict(Entangle()), Inflict(Targeted()), Damage(7)])
-blindingShot = Ability("Blinding Shot", 5, actions = [Inflict(Blind()), Inflict(Evasive()), Damage(8)]) 
-missedMe = Ability("Missed Me", 0,  [MissedMe_MoonElf()], defense = True)
-lunarEclipse = Ability("Lunar Eclipse", ["Moon", "Moon", "Moon", "Moon", "Moon"], [Inflict(Evasive()), Inflict(Blind()), Inflict(Entangle()), Inflict(Targeted()), UndefendableDamage(12)], ultimate = True)
-
-moonAbilities = [longbow3, longbow4, longbow5, demisingShot, coveredShot, explodingArrow, \
-                entanglingShot, eclipse, blindingShot, missedMe, lunarEclipse]
-moonElf = Hero(name = "Moon Elf", dice = moonDice, abilities = moonAbilities, conditions = [])
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+
+        stale = self.pending.get(key)
+        if stale is not None and stale.cancel():
+            if debug: print(" === [BackgroundWorker Object]: Cancelled stale [{}] request.".format(key))
+
+        future = self.executor.submit(function, *args)
+        self.pending[key] = future
+        future.add_done_callback(lambda future: self.finished.put((key, generation, callback, future)))
+
+    def poll(self):
+        global debug, renderer
+
+        while not self.finished.empty():
+            key, generation, callback, future = self.finished.get()
+            if future.cancelled():
+                continue
+            if generation != self.generations[key]:
+                if debug: print(" === [BackgroundWorker Object]: Dropped stale [{}] result.".format(key))
+                continue
+            del self.pending[key]
+            if future.exception() is not None:
+                renderer.emit("error", "Background [{}] request failed: {}", key, future.exception())
+                continue
+            callback(future.result())
+
+        if self.running:
+            self.root.after(self.pollDelay, self.poll)
+
+    def shutdown(self):
+        self.running = False
+        self.executor.shutdown(wait = False, cancel_futures = True)
+
+def snapshotDice(dice):
+    """
+    Copies dice so a background computation is unaffected by rolls and toggles made on the Tk thread.
+    """
+    return [copy.copy(diceSegment) for diceSegment in dice]
+
+# =========== GUI
 
 from tkinter import *
 
-thisPlayer = moonElf
-otherPlayer = moonElf
+def guiGame():
+    moonElf = createMoonElf()
 
-# Create the main window
-root = Tk()
-root.title("Dice Throne")
+    thisPlayer = moonElf
+    otherPlayer = moonElf
 
-f_player = Frame(root)
-f_player.pack(side = LEFT)
+    # Create the main window
+    root = Tk()
+    root.title("Dice Throne")
 
-f_header = Frame(f_player, width=300, height=100, highlightbackground="black", highlightthickness=1)
-f_header.pack(side = TOP,fill = BOTH)
-l_name = Label(f_header, text = thisPlayer.name, highlightbackground = "black", highlightthickness = 1)
-l_name.pack(side = LEFT, fill = BOTH)
-l_health = Label(f_header, text = "HP: {}".format(thisPlayer.health), highlightbackground = "black", highlightthickness = 1)
-l_health.pack(side = RIGHT, fill = BOTH)
-l_combatPoints = Label(f_header, text = "CP: {}".format(thisPlayer.cp), highlightbackground = "black", highlightthickness = 1)
-l_combatPoints.pack(side = RIGHT, fill = BOTH)
+    f_player = Frame(root)
+    f_player.pack(side = LEFT)
 
-f_display = Frame(f_player, width=300, height=200, highlightbackground="black", highlightthickness=1)
-f_display.pack(side = TOP)
-f_display_L = Frame(f_display, width=150, height=200, highlightbackground="black", highlightthickness=1)
-f_display_L.pack(side = LEFT)
-f_display_R = Frame(f_display, width=150, height=200, highlightbackground="black", highlightthickness=1)
-f_display_R.pack(side = RIGHT)
+    f_header = Frame(f_player, width=300, height=100, highlightbackground="black", highlightthickness=1)
+    f_header.pack(side = TOP,fill = BOTH)
+    l_name = Label(f_header, text = thisPlayer.name, highlightbackground = "black", highlightthickness = 1)
+    l_name.pack(side = LEFT, fill = BOTH)
+    l_health = Label(f_header, text = "HP: {}".format(thisPlayer.health), highlightbackground = "black", highlightthickness = 1)
+    l_health.pack(side = RIGHT, fill = BOTH)
+    l_combatPoints = Label(f_header, text = "CP: {}".format(thisPlayer.cp), highlightbackground = "black", highlightthickness = 1)
+    l_combatPoints.pack(side = RIGHT, fill = BOTH)
 
-f_dice = Frame(f_player, width=300, height=50, highlightbackground="black", highlightthickness=1)
-f_dice.pack(side = TOP)
+    f_display = Frame(f_player, width=300, height=200, highlightbackground="black", highlightthickness=1)
+    f_display.pack(side = TOP)
+    f_display_L = Frame(f_display, width=150, height=200, highlightbackground="black", highlightthickness=1)
+    f_display_L.pack(side = LEFT)
+    f_display_R = Frame(f_display, width=150, height=200, highlightbackground="black", highlightthickness=1)
+    f_display_R.pack(side = RIGHT)
 
-f_conditions = Frame(f_player, width=300, height=50, highlightbackground="black", highlightthickness=1)
-f_conditions.pack(side = TOP)
+    f_dice = Frame(f_player, width=300, height=50, highlightbackground="black", highlightthickness=1)
+    f_dice.pack(side = TOP)
 
-f_selections = Frame(f_player, width=300, height=50, highlightbackground="black", highlightthickness=1)
-f_selections.pack(side = TOP)
+    f_conditions = Frame(f_player, width=300, height=50, highlightbackground="black", highlightthickness=1)
+    f_conditions.pack(side = TOP)
 
-def rollDice():
-    for dice in thisPlayer.dice:
-        dice.roll()
+    f_selections = Frame(f_player, width=300, height=50, highlightbackground="black", highlightthickness=1)
+    f_selections.pack(side = TOP)
 
-b_roll = Button(f_selections, text = "Roll", command=lambda: [rollDice(), updateDice(images, thisPlayer)])
-b_roll.pack(side = RIGHT)
+    #Show narration from the engine
+    f_log = Frame(f_player, width=300, height=100, highlightbackground="black", highlightthickness=1)
+    f_log.pack(side = TOP, fill = BOTH)
+    l_log = Label(f_log, text = "", justify = LEFT, anchor = "w")
+    l_log.pack(side = TOP, fill = BOTH)
+    logLines = []
 
-#Add dice images
+    def showNarration(event, message):
+        logLines.append(message)
+        del logLines[:-5]
+        l_log.config(text = "\n".join(logLines))
 
-images = []
-imageButtons = []
-for i in range(5):
-    img = PhotoImage(file = "defaultDice/d0.png")
-    images.append(img)
-    imageButtons.append(Button(f_dice, image = img, command=lambda i=i: [thisPlayer.dice[i].toggle(), updateDice(images, thisPlayer)]))
+    renderer.subscribe(showNarration)
 
-def updateDice(images, thisPlayer, enabled = 5):
-    try:
+    def rollDice():
+        for dice in thisPlayer.dice:
+            dice.roll()
+
+    worker = BackgroundWorker(root)
+
+    def requestAbilities():
+        worker.submit("abilities", thisPlayer.getValidAbilities, updateAbilities, snapshotDice(thisPlayer.dice))
+
+    def updateAbilities(validAbilities):
         i = 0
-        for image in images:
-            image.config(file = "{}/d{}.png".format(thisPlayer.name, thisPlayer.dice[i].value))
+        for button in abilityButtons:
+            if thisPlayer.abilities[i] in validAbilities:
+                button.config(state = "normal")
+            else:
+                button.config(state = "disabled")
             i += 1
-    except:
+
+    def closeWindow():
+        renderer.unsubscribe(showNarration)
+        worker.shutdown()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", closeWindow)
+
+    b_roll = Button(f_selections, text = "Roll", command=lambda: [rollDice(), updateDice(images, thisPlayer), requestAbilities()])
+    b_roll.pack(side = RIGHT)
+
+    #Add dice images
+
+    images = []
+    imageButtons = []
+    for i in range(5):
+        img = PhotoImage(file = "defaultDice/d0.png")
+        images.append(img)
+        imageButtons.append(Button(f_dice, image = img, command=lambda i=i: [thisPlayer.dice[i].toggle(), updateDice(images, thisPlayer), requestAbilities()]))
+
+    def updateDice(images, thisPlayer, enabled = 5):
+        try:
+            i = 0
+            for image in images:
+                image.config(file = "{}/d{}.png".format(thisPlayer.name, thisPlayer.dice[i].value))
+                i += 1
+        except:
+            i = 0
+            for image in images:
+                image.config(file = "{}/d{}.png".format("defaultDice", thisPlayer.dice[i].value))
+                i += 1
+
         i = 0
-        for image in images:
-            image.config(file = "{}/d{}.png".format("defaultDice", thisPlayer.dice[i].value))
+        for image in imageButtons:
+            if thisPlayer.dice[i].locked:
+                image.config(bg="blue")
+            else:
+                image.config(bg="black")
+            if i < enabled:
+                image.config(state = "normal")
+            else:
+                image.config(state = "disabled")
+
             i += 1
 
-    i = 0
-    for image in imageButtons:
-        if thisPlayer.dice[i].locked:
-            image.config(bg="blue")
-        else:
-            image.config(bg="black")
-        if i < enabled:
-            image.config(state = "normal")
-        else:
-            image.config(state = "disabled")
+    updateDice(images, thisPlayer)
 
+    #Add Ability Images
+    abilityButtons = []
+    i = 0
+    for ability in thisPlayer.abilities:
+        dsp = f_display_L
+        if i > len(thisPlayer.abilities) / 2:
+            dsp = f_display_R
+        btn = Button(dsp, text = ability.name, state = "disabled", command = lambda i=i: [thisPlayer.abilities[i].use(otherPlayer)])
+        btn.pack(side = TOP)
+        abilityButtons.append(btn)
         i += 1
 
-updateDice(images, thisPlayer)
-
-#Add Ability Images
-abilityButtons = []
-i = 0
-for ability in thisPlayer.abilities:
-    dsp = f_display_L
-    if i > len(thisPlayer.abilities) / 2:
-        dsp = f_display_R
-    btn = Button(dsp, text = ability.name, state = "disabled", command = lambda i=i: [thisPlayer.abilities[i].use(otherPlayer)])
-    btn.pack(side = TOP)
-    abilityButtons.append(btn)
-    i += 1
-        
-for label in imageButtons:
-    label.pack(side=LEFT, fill = BOTH)
+    for label in imageButtons:
+        label.pack(side=LEFT, fill = BOTH)
+
+    # Run the Tkinter event loop
+    root.mainloop()
 
-# Run the Tkinter event loop
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    guiGame()
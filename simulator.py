@@ -0,0 +1,304 @@
+"""
+Headless Dice Throne games.
+
+Plays two heroes against each other with no console or GUI interaction, following the same
+turn structure as consoleGame. The choices a player would type in are made by policy objects.
+"""
+
+import collections
+import hashlib
+import itertools
+import multiprocessing
+
+import diceThrone
+
+#Bump whenever a change to the engine, simulateGame or GreedyPolicy changes how a seeded game plays out.
+#Cached results keyed on it, such as the balancer's, are then recomputed instead of served stale.
+RULES_VERSION = 4
+
+class GreedyPolicy:
+    """
+    Default decision policy for simulated players.
+
+    Locks every dice showing the most common face, and uses the available ability dealing the most damage.
+    """
+
+    def chooseLocks(self, hero, opponent):
+        """
+        Parameters:
+            hero (Hero): The rolling hero, with its dice showing the latest roll.
+            opponent (Hero): The hero being attacked.
+
+        Returns:
+            list of bool: Whether each of the hero's dice should be locked for the next roll.
+        """
+        counts = {}
+        for dice in hero.dice:
+            counts[dice.side] = counts.get(dice.side, 0) + 1
+
+        bestSide = max(counts, key = lambda side: counts[side])
+        return [dice.side == bestSide for dice in hero.dice]
+
+    def chooseAbility(self, hero, opponent, abilities):
+        """
+        Parameters:
+            hero (Hero): The attacking hero.
+            opponent (Hero): The hero being attacked.
+            abilities (list of Ability objects): Abilities valid for the final roll.
+
+        Returns:
+            Ability: The ability to use, or None to pass.
+        """
+        if abilities == []:
+            return None
+
+        best = abilities[0]
+        for ability in abilities:
+            if ability.ultimate:
+                return ability
+            if abilityDamage(ability) >= abilityDamage(best):
+                best = ability
+        return best
+
+    def spendEvasive(self, hero):
+        """
+        Parameters:
+            hero (Hero): The hero holding an Evasive condition, about to take damage.
+
+        Returns:
+            bool: Whether to spend the condition on this damage.
+        """
+        return True
+
+    def endTurn(self, hero, opponent):
+        """
+        Called once the hero's offensive roll phase and ability are resolved. Learning policies update here.
+        """
+        pass
+
+def abilityDamage(ability):
+    """
+    Returns the flat damage printed on an ability's actions, ignoring conditions and rolled effects.
+    """
+    damage = 0
+    for action in ability.actions:
+        damage += getattr(action, "damage", 0)
+    return damage
+
+class DiceStream:
+    """
+    Counter based dice stream: the nth draw is a hash of the stream's key and n, so streams are free to create.
+
+    Attributes:
+        key (str): Identifies the stream.
+        draws (int): Draws made so far.
+        antithetic (bool): Mirror every roll, v becoming a + b - v.
+    """
+
+    def __init__(self, key, antithetic = False):
+        self.key = key
+        self.draws = 0
+        self.antithetic = antithetic
+
+    def randint(self, a, b):
+        digest = hashlib.blake2b("{}:{}".format(self.key, self.draws).encode(), digest_size = 8).digest()
+        self.draws += 1
+        value = a + int.from_bytes(digest, "little") % (b - a + 1)
+        return a + b - value if self.antithetic else value
+
+def seedDice(heroes, key, antithetic = False, players = None):
+    """
+    Gives every dice its own random stream, derived from the key, the player and the dice position.
+
+    simulateGame reseeds the dice at every step of a turn with the seed, the turn and the step, e.g. each
+    offensive roll attempt. Games with the same seed then see the same rolls for the same step of the same
+    turn, however many rolls came before it. Rolls within one step, such as the defensive roll and the
+    Evasive rolls that follow it, are still drawn in order.
+
+    Parameters:
+        heroes (list of Hero objects): The players, in turn order.
+        key (str): Identifies the streams, e.g. "seed:turn:step".
+        antithetic (bool): Mirror every roll, see DiceStream.
+        players (list of int): Players whose dice are reseeded. Defaults to every player.
+    """
+    if players is None:
+        players = range(len(heroes))
+    for player in players:
+        for i in range(len(heroes[player].dice)):
+            heroes[player].dice[i].rng = DiceStream("{}:{}:{}".format(key, player, i), antithetic)
+
+def quiet(renderer = None):
+    """
+    Turns off debug output and input prompts in the engine. Simulated games must never prompt for input.
+
+    Parameters:
+        renderer (Renderer): Where narration goes. Defaults to a NullRenderer.
+    """
+    diceThrone.debug = False
+    diceThrone.gameOutput = False
+    if renderer is None:
+        renderer = diceThrone.NullRenderer()
+    diceThrone.renderer = renderer
+
+def simulateGame(heroes, seed = None, policies = None, maxTurns = 100, renderer = None, observer = None, antithetic = False):
+    """
+    Plays a game between two freshly created heroes.
+
+    Parameters:
+        heroes (list of Hero objects): The two players, in turn order. They are modified by the game.
+        seed (int or str): Key for the dice streams, see seedDice. None leaves the dice on the global random state.
+        policies (list of policy objects): Decision makers for each player, also set as each hero's policy. Defaults to GreedyPolicy.
+        maxTurns (int): Turns played before the game is called a draw.
+        renderer (Renderer): Narration sink for the game. Defaults to a NullRenderer.
+        observer (callable): Called with no arguments at the start, after every roll and lock choice,
+            and after every offensive roll phase, e.g. broadcast.StateBroadcaster.update.
+        antithetic (bool): Mirror every roll of the seeded streams, see DiceStream.
+
+    Returns:
+        dict: The winner (0, 1 or None), turns played, damage dealt by each player,
+        and per-ability uses and damage for each player.
+    """
+    #Narration, debug output and prompts are switched off for the game only, so a console game or GUI
+    #sharing the process keeps its own renderer afterwards.
+    saved = (diceThrone.debug, diceThrone.gameOutput, diceThrone.renderer)
+    quiet(renderer)
+    try:
+        if policies is None:
+            policies = [GreedyPolicy(), GreedyPolicy()]
+        for player in range(len(heroes)):
+            heroes[player].policy = policies[player]
+
+        startingHealth = [hero.health for hero in heroes]
+        abilityUses = [{}, {}]
+        abilityDamageDealt = [{}, {}]
+
+        if observer is None:
+            observer = lambda: None
+        observer()
+
+        turncount = 0
+        while turncount < maxTurns:
+            player = turncount % 2
+            currentPlayer = heroes[player]
+            opponent = heroes[1 - player]
+            policy = policies[player]
+
+            if turncount != 0:
+                currentPlayer.cp += 1
+
+            #Offensive Roll Phase
+            currentPlayer.rolls = 3
+            for dice in currentPlayer.dice:
+                dice.locked = False
+
+            if seed is not None:
+                seedDice(heroes, "{}:{}:upkeep".format(seed, turncount), antithetic, [player])
+            skipped = currentPlayer.triggerCondition("PreOffRoll") == -418
+            if skipped:
+                currentPlayer.rolls = 0
+
+            attempt = 0
+            while currentPlayer.rolls > 0:
+                if seed is not None:
+                    seedDice(heroes, "{}:{}:roll{}".format(seed, turncount, attempt), antithetic, [player])
+                attempt += 1
+                for dice in currentPlayer.dice:
+                    dice.roll()
+                currentPlayer.rolls -= 1
+                observer()
+
+                if currentPlayer.rolls > 0:
+                    locks = policy.chooseLocks(currentPlayer, opponent)
+                    for i in range(len(currentPlayer.dice)):
+                        currentPlayer.dice[i].locked = locks[i]
+                    observer()
+
+            for dice in currentPlayer.dice:
+                dice.locked = False
+
+            if seed is not None:
+                seedDice(heroes, "{}:{}:ability".format(seed, turncount), antithetic)
+            ability = None
+            if not skipped:
+                ability = policy.chooseAbility(currentPlayer, opponent, currentPlayer.getValidAbilities())
+            if ability is not None:
+                healthBefore = opponent.health
+                ability.use(opponent)
+                abilityUses[player][ability.name] = abilityUses[player].get(ability.name, 0) + 1
+                abilityDamageDealt[player][ability.name] = abilityDamageDealt[player].get(ability.name, 0) + healthBefore - opponent.health
+
+            policy.endTurn(currentPlayer, opponent)
+            observer()
+
+            turncount += 1
+
+            if heroes[0].health <= 0 or heroes[1].health <= 0:
+                break
+
+        winner = None
+        if heroes[0].health > 0 and heroes[1].health <= 0:
+            winner = 0
+        elif heroes[1].health > 0 and heroes[0].health <= 0:
+            winner = 1
+
+        return {
+            "seed": seed,
+            "winner": winner,
+            "turns": turncount,
+            "damage": [startingHealth[1] - heroes[1].health, startingHealth[0] - heroes[0].health],
+            "abilityUses": abilityUses,
+            "abilityDamage": abilityDamageDealt,
+        }
+    finally:
+        diceThrone.debug, diceThrone.gameOutput, diceThrone.renderer = saved
+
+def iterShards(function, shards, processes = None):
+    """
+    Runs shards of simulation work on a process pool, yielding each result in shard order as it arrives.
+
+    Only a couple of shards per worker are dispatched ahead of the consumer, so results never pile up in
+    memory. Closing the generator early dispatches no more shards and abandons the ones still running.
+
+    Parameters:
+        function (callable): Runs one shard in a worker process. Must be importable by the workers.
+        shards (iterable): Arguments for function, one per shard.
+        processes (int): Worker processes. Defaults to the number of cores.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    shards = iter(shards)
+    with multiprocessing.Pool(processes, initializer = quiet) as pool:
+        pending = collections.deque()
+        for shard in itertools.islice(shards, 2 * processes):
+            pending.append(pool.apply_async(function, (shard,)))
+
+        while pending:
+            yield pending.popleft().get()
+            for shard in itertools.islice(shards, 1):
+                pending.append(pool.apply_async(function, (shard,)))
+
+def runShards(function, shards, stop = None, processes = None):
+    """
+    Runs shards of simulation work with iterShards, checking a stopping rule as results arrive.
+
+    Results are checked in shard order, so the point a batch stops at does not depend on which worker
+    finishes first. Once stop returns True no more shards are dispatched.
+
+    Parameters:
+        function (callable): Runs one shard in a worker process. Must be importable by the workers.
+        shards (iterable): Arguments for function, one per shard.
+        stop (callable): Called with the list of results so far. Returns True to end the batch.
+        processes (int): Worker processes. Defaults to the number of cores.
+
+    Returns:
+        list: Results of every shard checked, in shard order.
+    """
+    results = []
+    stream = iterShards(function, shards, processes)
+    for result in stream:
+        results.append(result)
+        if stop is not None and stop(results):
+            stream.close()
+            break
+    return results
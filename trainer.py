@@ -0,0 +1,320 @@
+"""
+Tabular Q-learning of offensive roll decisions through self-play.
+
+A decision is encoded from the dice multiset, the rolls left, the opponent's health bucket and
+the opponent's conditions. Each offensive roll phase is an episode: up to two lock choices followed
+by an ability choice, rewarded with the damage dealt minus the damage taken while using it, plus a
+bonus for finishing the opponent. Table entries start as NaN, and decisions in rows that were never
+updated fall back to simulator.GreedyPolicy.
+
+Worker processes play games against themselves and update one value table held in
+multiprocessing.shared_memory. Updates are lock free; with a table this size collisions are rare
+and only cost a lost update.
+
+Example:
+    python trainer.py --episodes 200000 --workers 4 --out moonElf.q
+    python -c "import diceThrone, trainer; diceThrone.consoleGame(trainer.loadPolicy('moonElf.q'))"
+"""
+
+import argparse
+import itertools
+import math
+import multiprocessing
+import random
+from array import array
+from multiprocessing import shared_memory
+
+import diceThrone
+import simulator
+
+DICE = 5
+ROLL_STATES = 3
+HEALTH_BUCKETS = 5
+CONDITIONS = ["Targeted", "Blind", "Entangle", "Evasive"]
+ACTIONS = 2 ** DICE #Lock masks. Ability choices use the first len(hero.abilities) actions.
+WIN_BONUS = 20
+
+multisets = {}
+for values in itertools.combinations_with_replacement(range(1, 7), DICE):
+    multisets[values] = len(multisets)
+
+STATES = len(multisets) * ROLL_STATES * HEALTH_BUCKETS * 2 ** len(CONDITIONS)
+
+def encodeState(hero, opponent):
+    """
+    Returns the table row for the hero's current decision.
+    """
+    diceIndex = multisets[tuple(sorted(dice.value for dice in hero.dice))]
+    rolls = min(max(hero.rolls, 0), ROLL_STATES - 1)
+    bucket = min(max(opponent.health, 0) // 10, HEALTH_BUCKETS - 1)
+
+    conditionBits = 0
+    for condition in opponent.conditions:
+        if condition.name in CONDITIONS:
+            conditionBits |= 1 << CONDITIONS.index(condition.name)
+
+    return ((diceIndex * ROLL_STATES + rolls) * HEALTH_BUCKETS + bucket) * 2 ** len(CONDITIONS) + conditionBits
+
+def locksFromMask(hero, mask):
+    """
+    Converts a lock mask over the dice in sorted order into a lock flag for each of the hero's dice.
+    """
+    order = sorted(range(len(hero.dice)), key = lambda i: hero.dice[i].value)
+    locks = [False] * len(hero.dice)
+    for position in range(len(order)):
+        locks[order[position]] = bool(mask & (1 << position))
+    return locks
+
+def maskFromLocks(hero, locks):
+    """
+    Converts a lock flag for each of the hero's dice into a lock mask over the dice in sorted order.
+    """
+    order = sorted(range(len(hero.dice)), key = lambda i: hero.dice[i].value)
+    mask = 0
+    for position in range(len(order)):
+        if locks[order[position]]:
+            mask |= 1 << position
+    return mask
+
+class QPolicy:
+    """
+    Decision policy reading a learned value table. Usable by simulator.simulateGame and consoleGame.
+
+    Attributes:
+        table (sequence of float): STATES * ACTIONS values, row major. NaN marks an action never updated.
+        fallback (policy object): Decides wherever none of the available actions has a value. Defaults to simulator.GreedyPolicy.
+    """
+
+    def __init__(self, table, fallback = None):
+        self.table = table
+        self.fallback = fallback if fallback is not None else simulator.GreedyPolicy()
+
+    def bestAction(self, state, actions):
+        """
+        Returns the action with the highest value, or None if none of the actions has been updated.
+        """
+        row = state * ACTIONS
+        best = None
+        for action in actions:
+            value = self.table[row + action]
+            if not math.isnan(value) and (best is None or value > self.table[row + best]):
+                best = action
+        return best
+
+    def stateValue(self, state, actions):
+        """
+        Returns the highest value of the actions in a state, counting a state with no updated actions as 0.
+        """
+        best = self.bestAction(state, actions)
+        return 0 if best is None else self.table[state * ACTIONS + best]
+
+    def chooseLocks(self, hero, opponent):
+        mask = self.bestAction(encodeState(hero, opponent), range(ACTIONS))
+        if mask is None:
+            return self.fallback.chooseLocks(hero, opponent)
+        return locksFromMask(hero, mask)
+
+    def chooseAbility(self, hero, opponent, abilities):
+        if abilities == []:
+            return None
+        action = self.bestAction(encodeState(hero, opponent), [hero.abilities.index(ability) for ability in abilities])
+        if action is None:
+            return self.fallback.chooseAbility(hero, opponent, abilities)
+        return hero.abilities[action]
+
+    def spendEvasive(self, hero):
+        return self.fallback.spendEvasive(hero)
+
+    def endTurn(self, hero, opponent):
+        pass
+
+class LearningPolicy(QPolicy):
+    """
+    Epsilon-greedy QPolicy that records each offensive roll phase and updates the table when it ends.
+
+    Attributes:
+        alpha (float): Learning rate.
+        epsilon (float): Chance of a random decision.
+        rng (Random): Exploration randomness, kept apart from the dice.
+        trajectory (list of tuples): (state, action, next actions) for the current phase.
+        healthBefore (tuple): Hero and opponent health when the ability was chosen.
+    """
+
+    def __init__(self, table, alpha = 0.1, epsilon = 0.1, seed = None, fallback = None):
+        super().__init__(table, fallback)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.rng = random.Random(seed)
+        self.trajectory = []
+        self.healthBefore = None
+
+    def chooseLocks(self, hero, opponent):
+        state = encodeState(hero, opponent)
+        if self.rng.random() < self.epsilon:
+            mask = self.rng.randrange(ACTIONS)
+        else:
+            mask = self.bestAction(state, range(ACTIONS))
+            if mask is None:
+                mask = maskFromLocks(hero, self.fallback.chooseLocks(hero, opponent))
+        self.trajectory.append((state, mask))
+        return locksFromMask(hero, mask)
+
+    def chooseAbility(self, hero, opponent, abilities):
+        if abilities == []:
+            return None
+
+        state = encodeState(hero, opponent)
+        actions = [hero.abilities.index(ability) for ability in abilities]
+        if self.rng.random() < self.epsilon:
+            action = self.rng.choice(actions)
+        else:
+            action = self.bestAction(state, actions)
+            if action is None:
+                action = hero.abilities.index(self.fallback.chooseAbility(hero, opponent, abilities))
+
+        self.trajectory.append((state, action, actions))
+        self.healthBefore = (hero.health, opponent.health)
+        return hero.abilities[action]
+
+    def endTurn(self, hero, opponent):
+        reward = 0
+        if self.healthBefore is not None:
+            reward = (self.healthBefore[1] - opponent.health) - (self.healthBefore[0] - hero.health)
+            if opponent.health <= 0 < self.healthBefore[1]:
+                reward += WIN_BONUS
+
+        #Backwards through the phase, so each target uses the freshly updated next state
+        target = reward
+        for step in reversed(self.trajectory):
+            state, action = step[0], step[1]
+            index = state * ACTIONS + action
+            value = 0 if math.isnan(self.table[index]) else self.table[index]
+            self.table[index] = value + self.alpha * (target - value)
+
+            target = self.stateValue(state, step[2] if len(step) == 3 else range(ACTIONS))
+
+        self.trajectory = []
+        self.healthBefore = None
+
+def trainWorker(job):
+    """
+    Plays self-play games, updating the shared table in place. Runs in a worker process.
+    """
+    name, episodes, seed, alpha, epsilon, parameters = job
+
+    memory = shared_memory.SharedMemory(name = name)
+    table = memory.buf.cast("d")
+    try:
+        learners = [LearningPolicy(table, alpha, epsilon, seed), LearningPolicy(table, alpha, epsilon, seed + 1)]
+        for episode in range(episodes):
+            heroes = [diceThrone.createMoonElf("Learner", parameters), diceThrone.createMoonElf("Self", parameters)]
+            simulator.simulateGame(heroes, "train:{}:{}".format(seed, episode), learners) #Kept apart from evaluate's integer seeds
+    finally:
+        table.release()
+        memory.close()
+
+    return episodes
+
+def train(episodes = 100000, workers = None, alpha = 0.1, epsilon = 0.1, seed = 0, parameters = {}, table = None):
+    """
+    Learns a value table through self-play across worker processes.
+
+    Parameters:
+        episodes (int): Games to play in total.
+        workers (int): Worker processes. Defaults to the number of cores.
+        alpha (float): Learning rate.
+        epsilon (float): Exploration rate.
+        seed (int): Base seed for the dice and exploration.
+        parameters (dict): Moon Elf parameters, see diceThrone.moonElfDefaults.
+        table (array): Values to continue training from.
+
+    Returns:
+        array: The learned table of STATES * ACTIONS doubles.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    memory = shared_memory.SharedMemory(create = True, size = STATES * ACTIONS * 8)
+    try:
+        view = memory.buf.cast("d")
+        if table is None:
+            view[:] = array("d", [math.nan]) * (STATES * ACTIONS)
+        else:
+            view[:] = table
+        view.release()
+
+        chunks = [episodes // workers + (i < episodes % workers) for i in range(workers)]
+        jobs = [(memory.name, chunks[i], seed + 2 * i, alpha, epsilon, parameters) for i in range(workers)]
+        with multiprocessing.Pool(workers, initializer = simulator.quiet) as pool:
+            pool.map(trainWorker, jobs)
+
+        view = memory.buf.cast("d")
+        table = array("d", view)
+        view.release()
+        return table
+    finally:
+        memory.close()
+        memory.unlink()
+
+def savePolicy(table, path):
+    with open(path, "wb") as f:
+        table.tofile(f)
+
+def loadPolicy(path):
+    """
+    Reads a table written by savePolicy and returns it as a QPolicy.
+    """
+    table = array("d")
+    with open(path, "rb") as f:
+        table.fromfile(f, STATES * ACTIONS)
+    return QPolicy(table)
+
+def evaluate(policy, games = 1000, firstSeed = 0, parameters = {}):
+    """
+    Returns the win rate of a policy against GreedyPolicy, playing first and second equally often.
+
+    Training games are seeded with "train:" keys, so these games are never ones the table was trained on.
+
+    Parameters:
+        policy (policy object): The policy to evaluate.
+        games (int): Games to play.
+        firstSeed (int): Seed of the first game.
+        parameters (dict): Moon Elf parameters of both players, as given to train.
+    """
+    wins = 0
+    for i in range(games):
+        learnerFirst = i % 2 == 0
+        policies = [policy, simulator.GreedyPolicy()] if learnerFirst else [simulator.GreedyPolicy(), policy]
+        heroes = [diceThrone.createMoonElf("A", parameters), diceThrone.createMoonElf("B", parameters)]
+        result = simulator.simulateGame(heroes, firstSeed + i, policies)
+        if result["winner"] == (0 if learnerFirst else 1):
+            wins += 1
+    return wins / games
+
+def main():
+    parser = argparse.ArgumentParser(description = "Train a Moon Elf offensive roll policy through self-play.")
+    parser.add_argument("--episodes", type = int, default = 100000)
+    parser.add_argument("--workers", type = int, default = None)
+    parser.add_argument("--alpha", type = float, default = 0.1)
+    parser.add_argument("--epsilon", type = float, default = 0.1)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--param", action = "append", default = [], help = "name=value Moon Elf parameter, defaults otherwise")
+    parser.add_argument("--resume", default = None, help = "Table to continue training from")
+    parser.add_argument("--out", default = "moonElf.q")
+    args = parser.parse_args()
+
+    parameters = {}
+    for param in args.param:
+        name, value = param.split("=")
+        parameters[name] = int(value)
+
+    table = None
+    if args.resume is not None:
+        table = loadPolicy(args.resume).table
+
+    table = train(args.episodes, args.workers, args.alpha, args.epsilon, args.seed, parameters, table)
+    savePolicy(table, args.out)
+    print("Saved {} to {}. Win rate against GreedyPolicy: {:.3f}".format(args.episodes, args.out, evaluate(QPolicy(table), parameters = parameters)))
+
+if __name__ == "__main__":
+    main()